@@ -1,6 +1,8 @@
 import sqlite3
 from typing import Optional
 
+FETCH_BATCH_SIZE = 1000
+
 def dump_sqlite(db_path: str, table: Optional[str] = None, limit: Optional[int] = None) -> None:
     """
     Print the content of the SQLite database (all tables or a single table).
@@ -21,7 +23,7 @@ def dump_sqlite(db_path: str, table: Optional[str] = None, limit: Optional[int]
             if limit:
                 sql += f" LIMIT {limit}"
             cur.execute(sql)
-            rows = cur.fetchall()
+            rows = cur.fetchmany(FETCH_BATCH_SIZE)
             if not rows:
                 print("(empty)")
                 return
@@ -31,9 +33,11 @@ def dump_sqlite(db_path: str, table: Optional[str] = None, limit: Optional[int]
             print(" | ".join(headers))
             print("-" * (len(" | ".join(headers))))
 
-            # Print rows
-            for row in rows:
-                print(" | ".join(str(row[h]) if row[h] is not None else "NULL" for h in headers))
+            # Print rows, streaming one batch at a time
+            while rows:
+                for row in rows:
+                    print(" | ".join(str(row[h]) if row[h] is not None else "NULL" for h in headers))
+                rows = cur.fetchmany(FETCH_BATCH_SIZE)
 
         except sqlite3.Error as e:
             print(f"Error reading {table_name}: {e}")
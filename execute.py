@@ -1,9 +1,47 @@
 #!/usr/bin/env python3
 import argparse
+import re
 import sqlite3
 import json
 from typing import Any, Dict, Iterable, List, Optional
 
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used otherwise
+    orjson = None
+
+def _json_loads(s: str) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN/Infinity or ints beyond 64 bits; let stdlib json handle (or reject) it
+    return json.loads(s)
+
+_JSON_LITERALS = frozenset(("true", "false", "null"))
+_NUMERIC_RE = re.compile(r"-?[0-9]+(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?").fullmatch
+_NUMERIC_START = frozenset("-0123456789")
+
+def _maybe_json_parse(val: Any) -> Any:
+    if not isinstance(val, str) or not val:
+        return val
+
+    # Only pay for a stripped copy when there is surrounding whitespace
+    s = val.strip() if val[0].isspace() or val[-1].isspace() else val
+    if not s:
+        return val
+
+    # Try to parse JSON if it looks like JSON
+    # (the regex only runs on strings that can start a number)
+    first = s[0]
+    if first in "{[" or s in _JSON_LITERALS or (first in _NUMERIC_START and _NUMERIC_RE(s)):
+        try:
+            return _json_loads(s)
+        except Exception:
+            return val
+    return val
+
+
 def run_sql_to_dicts(
     db_path: str,
     sql: str,
@@ -15,40 +53,28 @@ def run_sql_to_dicts(
     Execute an SQL statement on a SQLite DB and return rows as dictionaries.
     JSON-looking strings are parsed into native Python objects by default.
     """
-
-    def _maybe_json_parse(val: Any, col: str) -> Any:
-        if not isinstance(val, str):
-            return val
-        s = val.strip()
-        if not s:
-            return val
-
-        # If user specified explicit JSON columns, only parse those
-        if json_columns is not None and col not in json_columns:
-            return val
-
-        # Try to parse JSON if it looks like JSON
-        if s[0] in "{[" or s in ("true", "false", "null") or s.replace('.', '', 1).isdigit():
-            try:
-                return json.loads(s)
-            except Exception:
-                return val
-        return val
-
     conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
     try:
         cur = conn.cursor()
         cur.execute(sql, tuple(params or []))
-        rows = cur.fetchall()
+        cols = [d[0] for d in cur.description or ()]
+
+        # If user specified explicit JSON columns, only parse those (decided once per column)
+        parse_cols = None if json_columns is None else set(json_columns)
+        # Like sqlite3.Row lookups, a duplicated column name (case-insensitively) reads the
+        # first column of that name, e.g. SELECT a.id, b.id gives {"id": a.id}
+        first: Dict[str, int] = {}
+        fields = [
+            (col, first.setdefault(col.lower(), i), parse_cols is None or col in parse_cols)
+            for i, col in enumerate(cols)
+        ]
 
         result: List[Dict[str, Any]] = []
-        for r in rows:
-            as_dict: Dict[str, Any] = {}
-            for col in r.keys():
-                parsed = _maybe_json_parse(r[col], col)
-                as_dict[col] = parsed
-            result.append(as_dict)
+        for r in cur.fetchall():
+            result.append({
+                col: _maybe_json_parse(r[i]) if parse else r[i]
+                for col, i, parse in fields
+            })
         return result
     finally:
         conn.close()
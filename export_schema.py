@@ -1,18 +1,59 @@
-import sqlite3, json
-from typing import Dict, Any, List, Optional, Tuple
+import sqlite3, json, copy, io, os
+from typing import Dict, Any, List, Optional, Set, Tuple, Union
+
+_MAX_COMPOUND_SELECT = 500  # SQLite's default limit on SELECTs joined by UNION ALL
+
+# (db_path, sample_json_rows, include_counts) -> (db_state, schema); see _db_state()
+_SCHEMA_CACHE: Dict[Tuple[str, int, Union[bool, str]], Tuple[Tuple[Any, ...], Dict[str, Any]]] = {}
+
+def _quote_ident(name: str) -> str:
+    """Quote an identifier (table/column/index name) for interpolation into SQL."""
+    return '"' + name.replace('"', '""') + '"'
+
+def _db_state(cur: sqlite3.Cursor, db_path: str) -> Optional[Tuple[Any, ...]]:
+    """
+    Cache key for the current DB contents: PRAGMA schema_version (bumped by every DDL change)
+    plus size/mtime of the DB file and its WAL, which move on every committed write, so that
+    row counts and JSON hints don't go stale. None if the DB is not a regular file.
+    """
+    cur.execute("PRAGMA schema_version")
+    version = cur.fetchone()[0]
+    db_file = os.fspath(db_path)
+    state: List[Any] = [version]
+    try:
+        for path in (db_file, db_file + "-wal"):
+            if path == db_file or os.path.exists(path):
+                st = os.stat(path)
+                state.append((st.st_size, st.st_mtime_ns))
+    except OSError:
+        return None
+    return tuple(state)
 
 def export_schema(db_path: str,
                   sample_json_rows: int = 50,
-                  include_counts: bool = True) -> Dict[str, Any]:
+                  include_counts: Union[bool, str] = True) -> Dict[str, Any]:
     """
     Introspect a SQLite DB and return a dict with:
       - tables -> { name, create_sql, row_count?, columns[], primary_key[], foreign_keys[], indexes[], column_docs?, json_hints{} }
-    JSON detection: for TEXT columns, samples up to `sample_json_rows` non-null values and tries json.loads.
+    Row counts: True (or "exact") runs COUNT(*); "approx" uses the rowid span (MAX - MIN + 1), which
+    reads two b-tree pages instead of scanning the table but overcounts after deletes.
+    JSON detection: for TEXT columns, samples each column's first `sample_json_rows` non-null values
+    (one UNION ALL query per table) and tries json.loads; the hints' top_level_keys / list_item_kinds
+    come sorted by key, so the exported JSON is deterministic (the formatters sort again, since they
+    may be given schemas from elsewhere).
+    Results are cached per DB state (schema_version + file size/mtime); callers get their own copy.
     """
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
     cur = conn.cursor()
 
+    cache_key = (db_path, sample_json_rows, include_counts)
+    state = _db_state(cur, db_path)
+    cached = _SCHEMA_CACHE.get(cache_key)
+    if state is not None and cached is not None and cached[0] == state:
+        conn.close()
+        return copy.deepcopy(cached[1])
+
     # list all user tables
     cur.execute("""
         SELECT name, sql
@@ -21,187 +62,231 @@ def export_schema(db_path: str,
         ORDER BY name
     """)
     tables = cur.fetchall()
-    table_names = [r["name"] for r in tables]
-    schema: Dict[str, Any] = {"tables": []}
+    table_names = {r["name"] for r in tables}
+    schema: Dict[str, Any] = {"tables": [
+        _describe_table(cur, t["name"], t["sql"], table_names, sample_json_rows, include_counts)
+        for t in tables
+    ]}
 
-    # helper: does a table exist?
-    def has_table(name: str) -> bool:
-        return name in table_names
+    conn.close()
+    if state is not None:
+        _SCHEMA_CACHE[cache_key] = (state, copy.deepcopy(schema))
+    return schema
 
-    for t in tables:
-        tname = t["name"]
-        create_sql = t["sql"]
+def _describe_table(cur: sqlite3.Cursor,
+                    tname: str,
+                    create_sql: str,
+                    table_names: Set[str],
+                    sample_json_rows: int,
+                    include_counts: Union[bool, str]) -> Dict[str, Any]:
+    """
+    Introspect a single table for export_schema(), on a cursor of its connection.
+    """
+    execute = cur.execute
+    qtable = _quote_ident(tname)
 
-        # columns + pk info
-        cur.execute(f"PRAGMA table_info('{tname}')")
-        cols = [dict(r) for r in cur.fetchall()]
-        pk_cols = [c["name"] for c in sorted(cols, key=lambda x: x["pk"]) if c["pk"] > 0]
+    # columns + pk info
+    execute(f"PRAGMA table_info({qtable})")
+    cols = [dict(r) for r in cur.fetchall()]
+    pk_cols = [c["name"] for c in sorted(cols, key=lambda x: x["pk"]) if c["pk"] > 0]
 
-        # foreign keys
-        cur.execute(f"PRAGMA foreign_key_list('{tname}')")
-        fks = [dict(r) for r in cur.fetchall()]
+    # foreign keys
+    execute(f"PRAGMA foreign_key_list({qtable})")
+    fks = [dict(r) for r in cur.fetchall()]
 
-        # indexes
-        cur.execute(f"PRAGMA index_list('{tname}')")
-        idx_list = []
-        for r in cur.fetchall():
-            idx_name = r["name"]
-            unique = bool(r["unique"])
-            # columns in index
-            cur.execute(f"PRAGMA index_info('{idx_name}')")
-            idx_cols = [rr["name"] for rr in cur.fetchall()]
-            idx_list.append({"name": idx_name, "unique": unique, "columns": idx_cols})
-
-        # optional column docs (if you ever create <table>__column_docs)
-        docs = {}
-        docs_table = f"{tname}__column_docs"
-        if has_table(docs_table):
-            cur.execute(f"SELECT column_name, COALESCE(description,'') AS description FROM '{docs_table}'")
-            docs = {r["column_name"]: r["description"] for r in cur.fetchall()}
-
-        # row count (optional)
-        row_count: Optional[int] = None
-        if include_counts:
-            try:
-                cur.execute(f"SELECT COUNT(*) AS n FROM '{tname}'")
-                row_count = cur.fetchone()["n"]
-            except sqlite3.Error:
-                row_count = None
-
-        # JSON hints: detect JSON-y TEXT columns and extract top-level keys/types by sampling
-        json_hints: Dict[str, Any] = {}
-        for c in cols:
-            col_name = c["name"]
-            col_type = (c["type"] or "").upper()
-            # Only try to detect JSON in TEXT/unknown columns
-            if "TEXT" in col_type or col_type == "":
+    # indexes
+    execute(f"PRAGMA index_list({qtable})")
+    idx_list = []
+    for r in cur.fetchall():
+        idx_name = r["name"]
+        unique = bool(r["unique"])
+        # columns in index
+        execute(f"PRAGMA index_info({_quote_ident(idx_name)})")
+        idx_cols = [rr["name"] for rr in cur.fetchall()]
+        idx_list.append({"name": idx_name, "unique": unique, "columns": idx_cols})
+
+    # optional column docs (if you ever create <table>__column_docs)
+    docs = {}
+    docs_table = f"{tname}__column_docs"
+    if docs_table in table_names:
+        execute(f"SELECT column_name, COALESCE(description,'') AS description FROM {_quote_ident(docs_table)}")
+        docs = {r["column_name"]: r["description"] for r in cur.fetchall()}
+
+    # row count (optional)
+    row_count: Optional[int] = None
+    row_count_approx = False
+    if include_counts == "approx":
+        try:
+            # separate subqueries so each side uses SQLite's min/max b-tree shortcut
+            execute(f"SELECT (SELECT MAX(_rowid_) FROM {qtable}) - (SELECT MIN(_rowid_) FROM {qtable}) + 1 AS n")
+            row_count = cur.fetchone()["n"] or 0
+            row_count_approx = True
+        except sqlite3.Error:
+            pass  # e.g. WITHOUT ROWID tables: fall back to an exact count
+    if include_counts and not row_count_approx:
+        try:
+            execute(f"SELECT COUNT(*) AS n FROM {qtable}")
+            row_count = cur.fetchone()["n"]
+        except sqlite3.Error:
+            row_count = None
+
+    # JSON hints: detect JSON-y TEXT columns and extract top-level keys/types by sampling
+    json_hints: Dict[str, Any] = {}
+    # Only try to detect JSON in TEXT/unknown columns. All of them are sampled in one
+    # UNION ALL query, each branch with its own LIMIT, so sparse columns still get
+    # their first `sample_json_rows` non-null values.
+    sample_cols = [c["name"] for c in cols if "TEXT" in (c["type"] or "").upper() or not c["type"]]
+    samples: Dict[str, List[Any]] = {name: [] for name in sample_cols}
+    branches = [
+        f"SELECT {i} AS c, v FROM (SELECT {_quote_ident(name)} AS v FROM {qtable} "
+        f"WHERE {_quote_ident(name)} IS NOT NULL LIMIT ?)"
+        for i, name in enumerate(sample_cols)
+    ]
+    for start in range(0, len(branches), _MAX_COMPOUND_SELECT):
+        chunk = branches[start:start + _MAX_COMPOUND_SELECT]
+        try:
+            execute(" UNION ALL ".join(chunk), (sample_json_rows,) * len(chunk))
+            for r in cur:
+                samples[sample_cols[r["c"]]].append(r["v"])
+        except sqlite3.Error:
+            pass
+
+    for col_name, values in samples.items():
+        parsed = []
+        for v in values:
+            if isinstance(v, (bytes, bytearray)):
+                try:
+                    v = v.decode("utf-8", "ignore")
+                except Exception:
+                    continue
+            if isinstance(v, str) and v and v[0] in "[{":
                 try:
-                    cur.execute(f"SELECT \"{col_name}\" AS v FROM '{tname}' WHERE \"{col_name}\" IS NOT NULL LIMIT ?", (sample_json_rows,))
-                    values = [row["v"] for row in cur.fetchall()]
-                except sqlite3.Error:
-                    values = []
-
-                parsed = []
-                for v in values:
-                    if isinstance(v, (bytes, bytearray)):
-                        try:
-                            v = v.decode("utf-8", "ignore")
-                        except Exception:
-                            continue
-                    if isinstance(v, str) and v and v[0] in "[{":
-                        try:
-                            parsed.append(json.loads(v))
-                        except Exception:
-                            pass
-
-                if parsed:
-                    # collect top-level keys & value kinds
-                    key_info: Dict[str, Dict[str, int]] = {}
-                    list_item_kinds: Dict[str, int] = {}
-                    for p in parsed:
-                        if isinstance(p, dict):
-                            for k, vv in p.items():
-                                kind = _py_kind(vv)
-                                key_info.setdefault(k, {}).setdefault(kind, 0)
-                                key_info[k][kind] += 1
-                        elif isinstance(p, list):
-                            for it in p[:10]:
-                                list_item_kinds.setdefault(_py_kind(it), 0)
-                                list_item_kinds[_py_kind(it)] += 1
-
-                    hint: Dict[str, Any] = {"detected": True}
-                    if key_info:
-                        # summarize top-level keys and dominant kinds
-                        summarized = {
-                            k: max(kinds.items(), key=lambda kv: kv[1])[0]  # pick most frequent kind
-                            for k, kinds in key_info.items()
-                        }
-                        hint["top_level_keys"] = summarized
-                    if list_item_kinds:
-                        hint["list_item_kinds"] = list_item_kinds
-
-                    json_hints[col_name] = hint
-
-        schema["tables"].append({
-            "name": tname,
-            "create_sql": create_sql,
-            "row_count": row_count,
-            "columns": [{
-                "name": c["name"],
-                "type": c["type"],
-                "notnull": bool(c["notnull"]),
-                "default": c["dflt_value"],
-                "pk_position": c["pk"],  # 0 if not PK; >0 indicates position in composite PK
-                "doc": docs.get(c["name"])
-            } for c in cols],
-            "primary_key": pk_cols,
-            "foreign_keys": fks,
-            "indexes": idx_list,
-            "json_hints": json_hints or None
-        })
+                    parsed.append(json.loads(v))
+                except Exception:
+                    pass
 
-    conn.close()
-    return schema
+        if parsed:
+            # collect top-level keys & value kinds
+            key_info: Dict[str, Dict[str, int]] = {}
+            list_item_kinds: Dict[str, int] = {}
+            for p in parsed:
+                if isinstance(p, dict):
+                    for k, vv in p.items():
+                        kind = _py_kind(vv)
+                        key_info.setdefault(k, {}).setdefault(kind, 0)
+                        key_info[k][kind] += 1
+                elif isinstance(p, list):
+                    for it in p[:10]:
+                        list_item_kinds.setdefault(_py_kind(it), 0)
+                        list_item_kinds[_py_kind(it)] += 1
+
+            hint: Dict[str, Any] = {"detected": True}
+            if key_info:
+                # summarize top-level keys and dominant kinds
+                summarized = {
+                    k: max(kinds.items(), key=lambda kv: kv[1])[0]  # pick most frequent kind
+                    for k, kinds in sorted(key_info.items())
+                }
+                hint["top_level_keys"] = summarized
+            if list_item_kinds:
+                hint["list_item_kinds"] = dict(sorted(list_item_kinds.items()))
+
+            json_hints[col_name] = hint
+
+    return {
+        "name": tname,
+        "create_sql": create_sql,
+        "row_count": row_count,
+        "row_count_approx": row_count_approx,
+        "columns": [{
+            "name": c["name"],
+            "type": c["type"],
+            "notnull": bool(c["notnull"]),
+            "default": c["dflt_value"],
+            "pk_position": c["pk"],  # 0 if not PK; >0 indicates position in composite PK
+            "doc": docs.get(c["name"])
+        } for c in cols],
+        "primary_key": pk_cols,
+        "foreign_keys": fks,
+        "indexes": idx_list,
+        "json_hints": json_hints or None
+    }
+
+# exact-type lookup (json.loads only produces these types), so bool can't be mistaken for int
+_PY_KINDS = {
+    type(None): "null",
+    bool: "boolean",
+    int: "integer",
+    float: "real",
+    str: "string",
+    dict: "object",
+    list: "array",
+}
 
 def _py_kind(v: Any) -> str:
-    if v is None: return "null"
-    if isinstance(v, bool): return "boolean"
-    if isinstance(v, int): return "integer"
-    if isinstance(v, float): return "real"
-    if isinstance(v, str): return "string"
-    if isinstance(v, dict): return "object"
-    if isinstance(v, list): return "array"
-    return "other"
+    return _PY_KINDS.get(type(v), "other")
+
+_COL_PREFIX = "  - "
+_PRIMARY_KEY = " PRIMARY KEY"
+_NOT_NULL = " NOT NULL"
+_JSON1_NOTE = "Note: JSON columns can be queried via SQLite JSON1 (e.g., json_extract(col, '$.path'))."
 
 def format_schema_for_llm(schema: Dict[str, Any]) -> str:
     """
     Produce a concise, LLM-friendly text description of the DB.
     """
-    lines: List[str] = []
+    buf = io.StringIO()
+    write = buf.write
     for t in schema["tables"]:
-        header = f"Table {t['name']}"
+        write(f"Table {t['name']}")
         if t.get("row_count") is not None:
-            header += f" (rows: {t['row_count']})"
-        lines.append(header + ":")
+            write(f" (rows: {'~' if t.get('row_count_approx') else ''}{t['row_count']})")
+        write(":\n")
+        json_hints = t.get("json_hints") or {}
         # columns
         for c in t["columns"]:
-            col = f"  - {c['name']} {c['type'] or ''}".rstrip()
+            write(_COL_PREFIX)
+            write(f"{c['name']} {c['type'] or ''}".rstrip())
             if c["pk_position"]:
-                col += " PRIMARY KEY" + (f" (pos {c['pk_position']})" if c["pk_position"] > 1 else "")
+                write(_PRIMARY_KEY)
+                if c["pk_position"] > 1:
+                    write(f" (pos {c['pk_position']})")
             if c["notnull"]:
-                col += " NOT NULL"
+                write(_NOT_NULL)
             if c["default"] is not None:
-                col += f" DEFAULT {c['default']}"
+                write(f" DEFAULT {c['default']}")
             if c.get("doc"):
-                col += f"  // {c['doc']}"
+                write(f"  // {c['doc']}")
             # JSON hint
-            jh = (t.get("json_hints") or {}).get(c["name"])
+            jh = json_hints.get(c["name"])
             if jh and jh.get("detected"):
-                extras = []
-                if jh.get("top_level_keys"):
-                    tlk = ", ".join([f"{k}:{v}" for k, v in sorted(jh["top_level_keys"].items())])
-                    extras.append(f"keys[{tlk}]")
-                if jh.get("list_item_kinds"):
-                    lik = ", ".join([f"{k}:{v}" for k, v in jh["list_item_kinds"].items()])
-                    extras.append(f"list[{lik}]")
-                if extras:
-                    col += f"  (JSON: {', '.join(extras)})"
-            lines.append(col)
+                tlk = jh.get("top_level_keys")
+                lik = jh.get("list_item_kinds")
+                if tlk or lik:
+                    write("  (JSON: ")
+                    if tlk:
+                        write("keys[" + ", ".join(f"{k}:{v}" for k, v in sorted(tlk.items())) + "]")
+                    if lik:
+                        if tlk:
+                            write(", ")
+                        write("list[" + ", ".join(f"{k}:{v}" for k, v in sorted(lik.items())) + "]")
+                    write(")")
+            write("\n")
         # foreign keys
         if t["foreign_keys"]:
-            lines.append("  Foreign keys:")
+            write("  Foreign keys:\n")
             for fk in t["foreign_keys"]:
-                lines.append(f"    - {fk['from']} -> {fk['table']}.{fk['to']} (on_update={fk['on_update']}, on_delete={fk['on_delete']})")
+                write(f"    - {fk['from']} -> {fk['table']}.{fk['to']} (on_update={fk['on_update']}, on_delete={fk['on_delete']})\n")
         # indexes
         if t["indexes"]:
-            lines.append("  Indexes:")
+            write("  Indexes:\n")
             for idx in t["indexes"]:
                 uniq = " UNIQUE" if idx["unique"] else ""
-                lines.append(f"    -{uniq} {idx['name']} ({', '.join(idx['columns'])})")
-        lines.append("")  # blank line
+                write(f"    -{uniq} {idx['name']} ({', '.join(idx['columns'])})\n")
+        write("\n")  # blank line
     # note about JSON1
-    lines.append("Note: JSON columns can be queried via SQLite JSON1 (e.g., json_extract(col, '$.path')).")
-    return "\n".join(lines)
+    write(_JSON1_NOTE)
+    return buf.getvalue()
 
 # --- Example CLI usage ---
 if __name__ == "__main__":
@@ -210,9 +295,11 @@ if __name__ == "__main__":
     parser.add_argument("--db", required=True, help="Path to SQLite DB.")
     parser.add_argument("--json-out", help="Where to write schema JSON (optional).")
     parser.add_argument("--txt-out", help="Where to write LLM-friendly text (optional).")
+    parser.add_argument("--approx-counts", action="store_true",
+                        help="Estimate row counts from the rowid range instead of COUNT(*).")
     args = parser.parse_args()
 
-    s = export_schema(args.db)
+    s = export_schema(args.db, include_counts="approx" if args.approx_counts else True)
     if args.json_out:
         pathlib.Path(args.json_out).write_text(json.dumps(s, indent=2), encoding="utf-8")
         print(f"Wrote {args.json_out}")
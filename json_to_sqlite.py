@@ -1,7 +1,45 @@
 import sqlite3
 import json
+import math
+from collections.abc import Collection
+from functools import lru_cache
+from itertools import starmap
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Dict, Iterable, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used otherwise
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # optional; needed only to stream files in stream_file_to_sqlite()
+    ijson = None
+
+def _dumps(value: Any) -> str:
+    """Compact UTF-8 JSON text (orjson when available, stdlib json otherwise)."""
+    if orjson is not None:
+        try:
+            out = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # e.g. ints beyond 64 bits; let stdlib json handle (or reject) it
+        else:
+            # orjson writes NaN/Infinity as null; stdlib json keeps them, so the stored text
+            # doesn't depend on whether orjson is installed
+            if b"null" not in out or not _has_non_finite(value):
+                return out.decode()
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+def _has_non_finite(value: Any) -> bool:
+    if isinstance(value, float):
+        return not math.isfinite(value)
+    if isinstance(value, dict):
+        return any(map(_has_non_finite, value.values()))
+    if isinstance(value, (list, tuple)):
+        return any(map(_has_non_finite, value))
+    return False
 
 # --------- Public API ---------
 def dicts_to_sqlite(
@@ -9,41 +47,85 @@ def dicts_to_sqlite(
     table_name: str,
     dictionary1: Dict[str, Dict[str, Any]],
     dictionary2: Optional[Dict[str, str]] = None,  # kept optional; if None/empty => no docs table
+    raw_json_map: Optional[Dict[str, str]] = None,
 ) -> None:
     """
     Create/extend an SQLite table from `dictionary1`.
     - dictionary1: { row_id: {col: value, ...}, ... }
     - dictionary2: (optional) { col: "description", ... } — if provided and non-empty,
       a <table>__column_docs table will be created/updated. Otherwise it's skipped.
+    - raw_json_map: (optional) { row_id: "<JSON text of the row>", ... } — stored as raw_json
+      as-is, skipping re-serialization; rows missing from it are serialized as usual.
     """
     if not dictionary1:
         raise ValueError("dictionary1 is empty.")
 
-    conn = sqlite3.connect(db_path)
+    conn = _connect_for_bulk_load(db_path)
     try:
-        conn.execute("PRAGMA journal_mode=WAL;")
-        conn.execute("PRAGMA foreign_keys=ON;")
-
         # 1) Infer schema
-        col_types, _ = analyze_schema(dictionary1.values())
+        col_types, _, native = _analyze_rows(dictionary1.values())
 
-        # 2) Create main table + column map
-        create_main_table(conn, table_name, col_types)
-        create_or_update_column_map(conn, table_name, col_types.keys())
+        # 2)-5) Create tables and upsert rows
+        _write_table(conn, table_name, col_types, dictionary1, dictionary2, raw_json_map, native)
+    finally:
+        conn.close()
 
-        # 3) Only create/populate column docs if provided (removed by default)
-        if dictionary2:
-            create_or_update_column_docs(conn, table_name)
-            upsert_column_docs(conn, table_name, dictionary2)
+def _connect_for_bulk_load(db_path: str) -> sqlite3.Connection:
+    # Autocommit mode: transactions are opened/closed explicitly by the writers.
+    # A larger statement cache keeps the upsert/column_map/docs statements prepared
+    # across the batches of a streamed load (and the ALTERs of a growing schema).
+    conn = sqlite3.connect(db_path, isolation_level=None, cached_statements=256)
+    _set_bulk_pragmas(conn)
+    return conn
 
-        # 4) Upsert rows
-        upsert_rows(conn, table_name, dictionary1, col_types.keys())
+def _set_bulk_pragmas(conn: sqlite3.Connection) -> None:
+    """
+    Bulk-load tuning for a connection that lives only as long as one load (PRAGMAs are
+    per-connection, so nothing needs restoring afterwards):
+    WAL makes synchronous=NORMAL safe (no fsync per commit), 128 MiB page cache, in-memory
+    temp b-trees, 256 MB memory-mapped I/O. foreign_keys is left off: the loader's tables
+    declare no foreign keys.
+    """
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    conn.execute("PRAGMA cache_size=-131072;")
+    conn.execute("PRAGMA mmap_size=268435456;")
 
-        conn.commit()
-    finally:
-        conn.close()
+def _write_table(
+    conn: sqlite3.Connection,
+    table_name: str,
+    col_types: Dict[str, str],
+    rows: Dict[str, Dict[str, Any]] | Iterable[Tuple[str, Dict[str, Any]]],
+    dictionary2: Optional[Dict[str, str]] = None,
+    raw_json_map: Optional[Dict[str, str]] = None,
+    native_values: bool = False,
+) -> None:
+    # One write transaction covers all DDL and DML below: a single WAL commit for the
+    # whole load instead of one per statement, and nothing half-written on failure
+    conn.execute("BEGIN IMMEDIATE;")
+
+    # 2) Create main table + column map
+    create_main_table(conn, table_name, col_types)
+    create_or_update_column_map(conn, table_name, col_types.keys())
+
+    # 3) Only create/populate column docs if provided (removed by default)
+    if dictionary2:
+        create_or_update_column_docs(conn, table_name)
+        upsert_column_docs(conn, table_name, dictionary2)
+
+    # 4) Upsert rows
+    upsert_rows(conn, table_name, rows, col_types.keys(), raw_json_map, native_values)
+    conn.execute("COMMIT;")
+
+    # 5) Secondary indexes (none today) belong here, after the load: building an
+    #    index once over a freshly created table is far cheaper than maintaining
+    #    it row by row during the inserts.
 
 # --------- File loader (single JSON only) ---------
+UPSERT_BATCH_SIZE = 10_000  # rows buffered per executemany by stream_file_to_sqlite()
+_ROWS_FORMAT_ERROR = "{path} must be a JSON object of the form {{ outer_key: {{ col: value, ... }}, ... }}"
+
 def dict_to_sqlite_from_file(
     db_path: str,
     table_name: str,
@@ -55,66 +137,195 @@ def dict_to_sqlite_from_file(
     """
     dictionary1 = _read_json(queuedata_path)
     if not isinstance(dictionary1, dict) or not all(isinstance(v, dict) for v in dictionary1.values()):
-        raise ValueError(
-            f"{queuedata_path} must be a JSON object of the form "
-            "{ outer_key: { col: value, ... }, ... }"
-        )
+        raise ValueError(_ROWS_FORMAT_ERROR.format(path=queuedata_path))
 
     dicts_to_sqlite(db_path, table_name, dictionary1, dictionary2=None)
 
+def stream_file_to_sqlite(
+    db_path: str,
+    table_name: str,
+    queuedata_path: str = "queuedata.json",
+) -> None:
+    """
+    Like dict_to_sqlite_from_file(), but for files too large to hold in memory: records are
+    streamed from `queuedata.json` in a single pass (requires ijson; without it the file is read
+    whole). The schema grows as records arrive (see StreamingSchema), and records are upserted
+    in batches of UPSERT_BATCH_SIZE, so memory stays bounded by one batch.
+    """
+    conn = _connect_for_bulk_load(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE;")
+        schema = StreamingSchema(conn, table_name)
+        batch: List[Tuple[str, Dict[str, Any]]] = []
+        n_rows = 0
+
+        def flush() -> None:
+            if batch:
+                # parsed JSON only holds exact dict/list/str/int/float/bool/None values
+                upsert_rows(conn, table_name, batch, schema.col_types.keys(), native_values=True)
+                batch.clear()
+
+        for record_id, row in iter_json_rows(queuedata_path):
+            if schema.outgrown_by(row):
+                flush()  # the pending rows are written with the current column set
+                schema.update(row)
+            batch.append((record_id, row))
+            n_rows += 1
+            if len(batch) >= UPSERT_BATCH_SIZE:
+                flush()
+        flush()
+
+        if not n_rows:
+            raise ValueError(f"{queuedata_path} contains no records.")
+        schema.finish()
+        conn.execute("COMMIT;")
+    finally:
+        conn.close()
+
+def iter_json_rows(path: str | Path) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield the (outer_key, row) pairs of a `{ outer_key: { col: value, ... }, ... }` JSON file
+    one at a time (streamed with ijson when installed).
+    """
+    if ijson is None:
+        data = _read_json(path)
+        if not isinstance(data, dict):
+            raise ValueError(_ROWS_FORMAT_ERROR.format(path=path))
+        yield from _checked_rows(path, data.items())
+        return
+    with Path(path).open("rb") as f:
+        yield from _checked_rows(path, ijson.kvitems(f, "", use_float=True))
+
+def _checked_rows(path: str | Path, items: Iterable[Tuple[str, Any]]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    for key, row in items:
+        if not isinstance(row, dict):
+            raise ValueError(_ROWS_FORMAT_ERROR.format(path=path))
+        yield key, row
+
 # --------- Helpers ---------
 def _read_json(path: str | Path) -> Any:
     p = Path(path)
+    if orjson is not None:
+        data = p.read_bytes()
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # e.g. NaN/Infinity or ints beyond 64 bits, which stdlib json accepts
+            return json.loads(data)
     with p.open("r", encoding="utf-8") as f:
         return json.load(f)
 
 SQLITE_TYPE_ORDER = ["INTEGER", "REAL", "TEXT"]
 
+# Affinity rank = index into SQLITE_TYPE_ORDER; merging two affinities is max() of ranks
+_TYPE_RANK = {
+    type(None): 0, bool: 0, int: 0,
+    float: 1,
+    str: 2, bytes: 2, list: 2, dict: 2, tuple: 2,
+}
+_TYPE_AFFINITY = {t: SQLITE_TYPE_ORDER[rank] for t, rank in _TYPE_RANK.items()}
+_AFFINITY_RANK = {affinity: rank for rank, affinity in enumerate(SQLITE_TYPE_ORDER)}
+
 def infer_sqlite_type(value: Any) -> str:
-    if value is None:
-        return "INTEGER"
-    if isinstance(value, bool):
-        return "INTEGER"
-    if isinstance(value, int) and not isinstance(value, bool):
+    affinity = _TYPE_AFFINITY.get(type(value))
+    if affinity is not None:
+        return affinity
+    # Subclasses (IntEnum, str subclasses, ...) and other types
+    if isinstance(value, int):  # includes bool
         return "INTEGER"
     if isinstance(value, float):
         return "REAL"
-    if isinstance(value, (str, bytes)):
-        return "TEXT"
-    return "TEXT"  # JSON fallback for lists/dicts/etc.
+    return "TEXT"  # str/bytes subclasses; JSON fallback for lists/dicts/etc.
 
 def merge_affinity(a: str, b: str) -> str:
-    if a == b:
-        return a
-    if "TEXT" in (a, b):
-        return "TEXT"
-    if "REAL" in (a, b):
-        return "REAL"
-    return "INTEGER"
+    # Wider affinity wins; names outside SQLITE_TYPE_ORDER lose to any known one
+    return a if _AFFINITY_RANK.get(a, -1) >= _AFFINITY_RANK.get(b, -1) else b
+
+def _rank_of(val: Any) -> int:
+    """Affinity rank (index into SQLITE_TYPE_ORDER) of a single value."""
+    rank = _TYPE_RANK.get(type(val))
+    if rank is None:  # subclasses and other exotic types
+        rank = _AFFINITY_RANK[infer_sqlite_type(val)]
+    return rank
 
 def analyze_schema(rows: Iterable[Dict[str, Any]]) -> Tuple[Dict[str, str], Dict[str, Any]]:
-    col_types: Dict[str, str] = {}
+    col_types, col_samples, _ = _analyze_rows(rows)
+    return col_types, col_samples
+
+def _analyze_rows(rows: Iterable[Dict[str, Any]]) -> Tuple[Dict[str, str], Dict[str, Any], bool]:
+    """
+    analyze_schema() plus whether every value is of an exact _TYPE_RANK type, i.e. one sqlite3
+    binds as-is or through the registered container adapters (subclasses such as OrderedDict
+    are not adapted: sqlite3 looks adapters up by exact type).
+    """
+    if isinstance(rows, Collection):
+        uniform = _analyze_uniform_rows(rows)
+        if uniform is not None:
+            return uniform
+
+    col_ranks: Dict[str, int] = {}
     col_samples: Dict[str, Any] = {}
+    native = True
     for row in rows:
         for col, val in row.items():
-            t = infer_sqlite_type(val)
-            if col not in col_types:
-                col_types[col] = t
-                if val is not None:
-                    col_samples[col] = val
-            else:
-                col_types[col] = merge_affinity(col_types[col], t)
-                if col not in col_samples and val is not None:
-                    col_samples[col] = val
-    return col_types, col_samples
+            rank = _TYPE_RANK.get(type(val))
+            if rank is None:  # subclasses and other exotic types
+                rank = _rank_of(val)
+                native = False
+            if rank > col_ranks.get(col, -1):
+                col_ranks[col] = rank
+            if val is not None and col not in col_samples:
+                col_samples[col] = val
+    col_types = {col: SQLITE_TYPE_ORDER[rank] for col, rank in col_ranks.items()}
+    return col_types, col_samples, native
+
+def _analyze_uniform_rows(rows: Collection[Dict[str, Any]]) -> Optional[Tuple[Dict[str, str], Dict[str, Any], bool]]:
+    """
+    Column-wise _analyze_rows() for the common case of rows that all have the same keys;
+    returns None otherwise. Each row is reduced to the tuple of its value types, and only the
+    distinct tuples (usually a handful) are ranked per column.
+    """
+    first = next(iter(rows), None)
+    if not isinstance(first, dict) or not first:
+        return None
+    cols = list(first)
+    n_cols = len(cols)
+    getter = itemgetter(*cols) if n_cols > 1 else lambda row: (row[cols[0]],)
+    try:
+        # same length + every column present (getter raises otherwise) => same keys
+        if any(len(row) != n_cols for row in rows):
+            return None
+        signatures = {tuple(map(type, getter(row))) for row in rows}
+    except (KeyError, TypeError):  # differing keys, or rows that aren't dicts
+        return None
+
+    ranks = [0] * n_cols
+    native = True
+    for signature in signatures:
+        for i, t in enumerate(signature):
+            rank = _TYPE_RANK.get(t)
+            if rank is None:  # subclasses and other exotic types: rank the actual values
+                col = cols[i]
+                rank = max(_rank_of(row[col]) for row in rows if type(row[col]) is t)
+                native = False
+            ranks[i] = max(ranks[i], rank)
+
+    col_types = {col: SQLITE_TYPE_ORDER[rank] for col, rank in zip(cols, ranks)}
+    col_samples: Dict[str, Any] = {}
+    for col in cols:
+        for row in rows:
+            if row[col] is not None:
+                col_samples[col] = row[col]
+                break
+    return col_types, col_samples, native
 
 # --------- DDL ---------
 def create_main_table(conn: sqlite3.Connection, table: str, col_types: Dict[str, str]) -> None:
-    cols_sql = [f'"{col}" {typ}' for col, typ in col_types.items()]
+    cols_sql = [f'"{col}" {typ},' for col, typ in col_types.items()]
     ddl = f"""
     CREATE TABLE IF NOT EXISTS "{table}" (
         record_id TEXT PRIMARY KEY,
-        {", ".join(cols_sql)},
+        {" ".join(cols_sql)}
         raw_json TEXT
     );
     """
@@ -127,11 +338,10 @@ def create_or_update_column_map(conn: sqlite3.Connection, table: str, cols: Iter
         stored_name   TEXT NOT NULL
     );
     """)
-    for c in cols:
-        conn.execute(
-            f'INSERT OR IGNORE INTO "{table}__column_map"(original_name, stored_name) VALUES (?, ?);',
-            (c, c),
-        )
+    conn.executemany(
+        f'INSERT OR IGNORE INTO "{table}__column_map"(original_name, stored_name) VALUES (?, ?);',
+        [(c, c) for c in cols],
+    )
 
 # (Only used if dictionary2 is provided; not called otherwise)
 def create_or_update_column_docs(conn: sqlite3.Connection, table: str) -> None:
@@ -143,12 +353,113 @@ def create_or_update_column_docs(conn: sqlite3.Connection, table: str) -> None:
     """)
 
 def upsert_column_docs(conn: sqlite3.Connection, table: str, docs: Dict[str, str]) -> None:
-    for col, desc in docs.items():
-        conn.execute(
-            f'INSERT INTO "{table}__column_docs"(column_name, description) VALUES (?, ?) '
-            f'ON CONFLICT(column_name) DO UPDATE SET description=excluded.description;',
-            (col, desc if desc is not None else ""),
+    conn.executemany(
+        f'INSERT INTO "{table}__column_docs"(column_name, description) VALUES (?, ?) '
+        f'ON CONFLICT(column_name) DO UPDATE SET description=excluded.description;',
+        [(col, desc if desc is not None else "") for col, desc in docs.items()],
+    )
+
+# --------- Single-pass (streaming) schema ---------
+class StreamingSchema:
+    """
+    Column types of a table that is filled in one pass over its rows, without a prior
+    analyze_schema() pass: the table is created from the first row, columns introduced by later
+    rows are added with ALTER TABLE ... ADD COLUMN, and a column whose values outgrow its declared
+    affinity (INTEGER -> REAL -> TEXT, as in merge_affinity) is rebuilt with the wider type.
+    Rebuilding re-reads each value from raw_json, so it gets the same affinity conversion as on
+    insert and the result matches a two-pass load (copying the column instead would turn 1 into
+    '1.0' on an INTEGER -> REAL -> TEXT path).
+    Added and rebuilt columns land after raw_json; finish() restores the column order a two-pass
+    load creates (record_id, data columns in first-seen order, raw_json).
+    """
+
+    def __init__(self, conn: sqlite3.Connection, table: str) -> None:
+        self.conn = conn
+        self.table = table
+        # Columns of this load (first-seen order) -> declared type
+        self.col_types: Dict[str, str] = {}
+        self._ranks: Dict[str, int] = {}
+        # Declared types of the existing table (empty if it doesn't exist yet)
+        self._declared: Dict[str, str] = {
+            name: (typ or "").upper()
+            for _, name, typ, *_ in conn.execute(f'PRAGMA table_info("{table}")')
+        }
+        self._existing = list(self._declared)
+
+    def outgrown_by(self, row: Dict[str, Any]) -> bool:
+        """True if `row` brings a new column or a value wider than its column's type."""
+        if not self._declared:
+            return True  # the table itself has to be created first
+        ranks = self._ranks
+        return any(_rank_of(val) > ranks.get(col, -1) for col, val in row.items())
+
+    def update(self, row: Dict[str, Any]) -> None:
+        """Issue the DDL needed to store `row` (call when outgrown_by(row) is True)."""
+        row_types = {col: infer_sqlite_type(val) for col, val in row.items()}
+        if not self._declared:
+            create_main_table(self.conn, self.table, row_types)
+            self._declared = {"record_id": "TEXT", **row_types, "raw_json": "TEXT"}
+            create_or_update_column_map(self.conn, self.table, row_types.keys())
+
+        for col, typ in row_types.items():
+            declared = self._declared.get(col)
+            if declared is None:
+                self.conn.execute(f'ALTER TABLE "{self.table}" ADD COLUMN "{col}" {typ};')
+                create_or_update_column_map(self.conn, self.table, [col])
+                declared = typ
+            elif declared in _AFFINITY_RANK:
+                wider = merge_affinity(declared, typ)
+                if wider != declared and self._retype_column(col, wider):
+                    declared = wider
+            self._declared[col] = declared
+            self.col_types[col] = declared
+            # Unknown declared types (BLOB, NUMERIC, ...) are never widened
+            rank = _AFFINITY_RANK.get(declared, len(SQLITE_TYPE_ORDER) - 1)
+            self._ranks[col] = max(rank, _AFFINITY_RANK[typ])
+
+    def _retype_column(self, col: str, typ: str) -> bool:
+        if sqlite3.sqlite_version_info < (3, 35, 0):
+            return False  # no ALTER TABLE ... DROP COLUMN: keep the narrower declared type
+        tmp = self._unused_name(f"{col}__retype", self._declared)
+        self.conn.execute(f'ALTER TABLE "{self.table}" ADD COLUMN "{tmp}" {typ};')
+        self.conn.execute(
+            f'UPDATE "{self.table}" SET "{tmp}" = COALESCE(json_extract(raw_json, ?), "{col}");',
+            (f'$."{col}"',),
         )
+        self.conn.execute(f'ALTER TABLE "{self.table}" DROP COLUMN "{col}";')
+        self.conn.execute(f'ALTER TABLE "{self.table}" RENAME COLUMN "{tmp}" TO "{col}";')
+        return True
+
+    def finish(self) -> None:
+        """Rebuild the table once if columns were appended after raw_json (call after the last row)."""
+        info = [(name, typ) for _, name, typ, *_ in self.conn.execute(f'PRAGMA table_info("{self.table}")')]
+        types = dict(info)
+        data_cols = [c for c in self._existing if c not in ("record_id", "raw_json")]
+        data_cols += [c for c in self.col_types if c not in self._existing]
+        if [name for name, _ in info] == ["record_id", *data_cols, "raw_json"]:
+            return
+
+        table_names = [name for (name,) in self.conn.execute("SELECT name FROM sqlite_master")]
+        tmp = self._unused_name(f"{self.table}__rebuild", table_names)
+        # Indexes and triggers go with the old table; recreate them on the rebuilt one
+        extras = [sql for (sql,) in self.conn.execute(
+            "SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL",
+            (self.table,),
+        )]
+        create_main_table(self.conn, tmp, {c: types[c] for c in data_cols})
+        col_list = ", ".join(f'"{c}"' for c in ["record_id", *data_cols, "raw_json"])
+        self.conn.execute(f'INSERT INTO "{tmp}" ({col_list}) SELECT {col_list} FROM "{self.table}";')
+        self.conn.execute(f'DROP TABLE "{self.table}";')
+        self.conn.execute(f'ALTER TABLE "{tmp}" RENAME TO "{self.table}";')
+        for sql in extras:
+            self.conn.execute(sql)
+
+    @staticmethod
+    def _unused_name(name: str, taken: Iterable[str]) -> str:
+        taken_lower = {t.lower() for t in taken}  # SQLite names are case-insensitive
+        while name.lower() in taken_lower:
+            name += "_"
+        return name
 
 # --------- DML ---------
 def to_db_scalar(value: Any) -> Any:
@@ -158,30 +469,95 @@ def to_db_scalar(value: Any) -> Any:
         return 1 if value else 0
     if isinstance(value, (int, float, str, bytes)):
         return value
-    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    return _dumps(value)
+
+# Containers are adapted to compact JSON text by sqlite3 itself while binding, so row values can
+# be passed through untouched (None -> NULL and bool -> 0/1 are handled natively by sqlite3).
+for _container in (dict, list, tuple):
+    sqlite3.register_adapter(_container, to_db_scalar)
 
 def upsert_rows(
     conn: sqlite3.Connection,
     table: str,
-    data: Dict[str, Dict[str, Any]],
+    data: Dict[str, Dict[str, Any]] | Iterable[Tuple[str, Dict[str, Any]]],
     columns: Iterable[str],
+    raw_json_map: Optional[Dict[str, str]] = None,
+    native_values: bool = False,
 ) -> None:
+    """
+    Insert or update rows by record_id. `data` is a { record_id: row } dict or an iterable of
+    (record_id, row) pairs, which is consumed lazily (e.g. straight from a file stream).
+    Values are mapped through to_db_scalar() unless `native_values` says they are all of the
+    exact types sqlite3 binds or adapts itself (see _analyze_rows()).
+    """
     cols = list(columns)
+    items = data.items() if isinstance(data, dict) else data
     placeholders = ", ".join(["?"] * (len(cols) + 2))  # + record_id + raw_json
-    col_list = ", ".join([f'"{c}"' for c in cols])
+    col_list = ", ".join(["record_id"] + [f'"{c}"' for c in cols] + ["raw_json"])
     update_set = ", ".join([f'"{c}"=excluded."{c}"' for c in cols] + ['raw_json=excluded.raw_json'])
 
     sql = f"""
-    INSERT INTO "{table}" (record_id, {col_list}, raw_json)
+    INSERT INTO "{table}" ({col_list})
     VALUES ({placeholders})
     ON CONFLICT(record_id) DO UPDATE SET
         {update_set};
     """
 
-    for record_id, row in data.items():
-        values = [to_db_scalar(row.get(c)) for c in cols]
-        raw = json.dumps(row, separators=(",", ":"), ensure_ascii=False)
-        conn.execute(sql, [str(record_id), *values, raw])
+    # record_ids from JSON are always str already; str() is only applied per row when
+    # they can't be checked up front (lazy iterables) or some aren't
+    if isinstance(data, dict):
+        str_ids = _STR_ONLY.issuperset(map(type, data))
+    elif isinstance(data, list):
+        str_ids = _STR_ONLY.issuperset(map(type, map(itemgetter(0), data)))
+    else:
+        str_ids = False
+
+    # Native values go through as-is and are converted by the registered sqlite3 adapters
+    row_params = _row_params_factory(tuple(cols), str_ids, not native_values)(_dumps, (raw_json_map or {}).get)
+
+    # One prepared statement on one cursor, stepped over a lazy parameter stream;
+    # executemany pulls rows as it goes, so memory stays bounded per row.
+    cur = conn.cursor()
+    cur.executemany(sql, starmap(row_params, items))
+
+_STR_ONLY = frozenset([str])
+
+@lru_cache(maxsize=32)
+def _row_params_factory(cols: Tuple[str, ...], str_ids: bool = False, convert: bool = False) -> Callable[..., Callable[[Any, Dict[str, Any]], Tuple[Any, ...]]]:
+    """
+    Generate (once per column set) a function turning (record_id, row) into the upsert parameter
+    tuple. Rows holding every column are read with one itemgetter call; others have every
+    column lookup spelled out, e.g.
+        return (str(record_id), get('a'), get('b'), raw if raw is not None else dumps(row))
+    so the per-row work has no loop over `cols` left. With `str_ids`, record_id is passed as is;
+    with `convert`, every value is mapped through to_db_scalar().
+    """
+    rid = "record_id" if str_ids else "str(record_id)"
+    getters = "".join(f"conv(get({c!r})), " if convert else f"get({c!r}), " for c in cols)
+    all_values = "*map(conv, get_all(row))" if convert else "*get_all(row)"
+    raw_json = "raw if raw is not None else dumps(row)"
+    full_row = ""
+    if len(cols) > 1:  # itemgetter with a single key returns the bare value
+        full_row = (
+            f"        if len(row) == {len(cols)}:\n"
+            "            try:\n"
+            f"                return ({rid}, {all_values}, {raw_json})\n"
+            "            except KeyError:\n"
+            "                pass\n"
+        )
+    src = (
+        "def factory(dumps, raw_get):\n"
+        "    get_all = all_cols\n"
+        "    def row_params(record_id, row):\n"
+        "        raw = raw_get(record_id)\n"
+        f"{full_row}"
+        "        get = row.get\n"
+        f"        return ({rid}, {getters}{raw_json})\n"
+        "    return row_params\n"
+    )
+    namespace: Dict[str, Any] = {"all_cols": itemgetter(*cols) if cols else None, "conv": to_db_scalar}
+    exec(compile(src, "<upsert row_params>", "exec"), namespace)
+    return namespace["factory"]
 
 # --------- Optional CLI ---------
 if __name__ == "__main__":
@@ -190,7 +566,12 @@ if __name__ == "__main__":
     parser.add_argument("--db", required=True, help="Path to SQLite DB file.")
     parser.add_argument("--table", required=True, help="Target table name, e.g., 'queuedata'.")
     parser.add_argument("--queuedata", default="queuedata.json", help="Path to queuedata.json (dictionary1).")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream the file record by record instead of loading it whole (for very large files).")
     args = parser.parse_args()
 
-    dict_to_sqlite_from_file(args.db, args.table, args.queuedata)
+    if args.stream:
+        stream_file_to_sqlite(args.db, args.table, args.queuedata)
+    else:
+        dict_to_sqlite_from_file(args.db, args.table, args.queuedata)
     print(f"Loaded '{args.queuedata}' into {args.db}:{args.table}")
@@ -1,5 +1,7 @@
 from typing import Dict, Any, Iterable, Optional, Mapping
 import fnmatch
+import os
+import re
 
 from export_schema import export_schema
 
@@ -26,10 +28,13 @@ def emit_minimal_schema_txt(
           - record_id TEXT PRIMARY KEY
           - acopytools TEXT  (JSON: keys[pr,array; pw,array; ...])
     """
+    # All patterns compiled once into one regex (same matching rules as fnmatch.fnmatch)
+    selected = None
+    if include_tables:
+        selected = re.compile("|".join(fnmatch.translate(os.path.normcase(pat)) for pat in include_tables)).match
+
     def table_selected(name: str) -> bool:
-        if not include_tables:
-            return True
-        return any(fnmatch.fnmatch(name, pat) for pat in include_tables)
+        return selected is None or selected(os.path.normcase(name)) is not None
 
     lines = []
     any_json = False
@@ -41,7 +46,7 @@ def emit_minimal_schema_txt(
 
         header = f"Table {tname}"
         if include_counts and t.get("row_count") is not None:
-            header += f" (rows: {t['row_count']})"
+            header += f" (rows: {'~' if t.get('row_count_approx') else ''}{t['row_count']})"
         lines.append(header + ":")
 
         allowed_cols = None
@@ -56,14 +61,16 @@ def emit_minimal_schema_txt(
                 continue
 
             ctype = (c.get("type") or "").strip()
-            line = f"  - {cname}" + (f" {ctype}" if ctype else "")
+            parts = ["  - ", cname]
+            if ctype:
+                parts += (" ", ctype)
 
             if c.get("pk_position", 0):
-                line += " PRIMARY KEY"
+                parts.append(" PRIMARY KEY")
             if c.get("notnull"):
-                line += " NOT NULL"
+                parts.append(" NOT NULL")
             if c.get("default") is not None:
-                line += f" DEFAULT {c['default']}"
+                parts += (" DEFAULT ", str(c["default"]))
 
             jh = json_hints.get(cname)
             if jh and jh.get("detected"):
@@ -78,9 +85,9 @@ def emit_minimal_schema_txt(
                 if lik:
                     extras.append("list[" + "; ".join(f"{k},{v}" for k, v in sorted(lik.items())) + "]")
                 if extras:
-                    line += "  (JSON: " + " ".join(extras) + ")"
+                    parts += ("  (JSON: ", " ".join(extras), ")")
 
-            lines.append(line)
+            lines.append("".join(parts))
 
         lines.append("")  # blank line between tables
 